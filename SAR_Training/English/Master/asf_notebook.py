@@ -6,23 +6,37 @@
 
 import math
 import os  # for chdir, getcwd, path.exists
+from bisect import bisect_left, bisect_right  # for slicing sorted products in filter_date_range
 import re
 import time  # for perf_counter
+import queue  # for the download/extract pipeline in download_hyp3_products
+import threading  # for the extractor threads draining the pipeline
+from concurrent.futures import ThreadPoolExecutor, as_completed  # for parallel product extraction
 import requests  # for post, get
+from functools import lru_cache  # for memoizing the product name date parser
 from getpass import getpass  # used to input URS creds and add to .netrc
 import zipfile  # for extractall, ZipFile, BadZipFile
 from datetime import datetime, date
 import glob
+import shutil  # for copyfileobj
 import sys
+import tempfile  # for spooling product zips in memory before extraction
 import urllib
 from subprocess import call, PIPE
 import json
 
+try:
+    import libarchive  # optional: inflates ~2x faster than zipfile's stock zlib
+except ImportError:
+    libarchive = None
+    _BAD_ARCHIVE_ERRORS = (zipfile.BadZipFile,)
+else:
+    _BAD_ARCHIVE_ERRORS = (zipfile.BadZipFile, libarchive.ArchiveError)
+
 import gdal  # for Open
 import numpy as np
 import pandas as pd
 
-from IPython.utils.text import SList
 from IPython.display import clear_output
 import ipywidgets as widgets
 from ipywidgets import Layout
@@ -31,13 +45,28 @@ from asf_hyp3 import API, LoginError  # for get_products, get_subscriptions, log
 
 from bokeh.plotting import figure
 from bokeh.tile_providers import get_provider, Vendors
-from bokeh.models import ColumnDataSource, GMapOptions, BoxSelectTool, HoverTool, CustomJSHover, CustomJS, Rect, Div, ResetTool, MultiPolygons
+from bokeh.models import ColumnDataSource, GMapOptions, BoxSelectTool, HoverTool, CustomJSHover, CustomJS, Rect, Div, PanTool, ResetTool, WheelZoomTool, MultiPolygons
 from bokeh.client import push_session
-from bokeh.io import curdoc, output_notebook, push_notebook, show
+from bokeh.io import curdoc, output_notebook, push_notebook, reset_output, show
 from bokeh import events
 from bokeh.models.glyphs import Rect
 
 
+# shared session so repeated Vertex/Hyp3 calls reuse pooled connections
+# instead of paying a TCP+TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# compiled once so the product loop in download_hyp3_products doesn't
+# recompile it per iteration; dots escaped so they only match literal dots
+_HYP3_URL_RE = re.compile(r'https://hyp3-download\.asf\.alaska\.edu/asf/data/(.*)\.zip')
+
+_VALID_DIRECTIONS = frozenset({'A', 'ASC', 'ASCENDING', 'D', 'DESC', 'DESCENDING'})
+
+# candidate polarization suffixes, in the order results are reported
+_POLARIZATIONS = ('VV', 'VH', 'vv', 'vh', 'HV', 'HH')
+
+
 #######################
 #  Utility Functions  #
 #######################
@@ -67,12 +96,40 @@ def new_directory(path: str):
     if os.path.exists(path):
         print(f"{path} already exists.")
     else:
-        os.makedirs(path)
+        os.makedirs(path, exist_ok=True)
         print(f"Created: {path}")
-    if not os.path.exists(path):
-        print(f"Failed to create path!")
         
 
+def _extract_one(output_dir: str, file_path: str, remove_zip=False):
+    """
+    Extracts a single zip archive into output_dir.
+    Worker for the extraction thread pool in download_hyp3_products.
+    Uses libarchive when installed, which links against libdeflate/zlib-ng
+    where available for a much faster inflate than the zlib behind zipfile.
+    Deletes the archive after a successful extraction if remove_zip is True.
+    """
+    if libarchive:
+        out_root = os.path.abspath(output_dir)
+        with libarchive.file_reader(file_path) as archive:
+            for entry in archive:
+                dest = os.path.abspath(os.path.join(out_root, entry.pathname))
+                # mirror extractall's zip-slip guard: skip entries whose
+                # resolved path escapes the output directory
+                if os.path.commonpath([out_root, dest]) != out_root:
+                    continue
+                if entry.isdir:
+                    os.makedirs(dest, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                with open(dest, 'wb') as f:
+                    for block in entry.get_blocks():
+                        f.write(block)
+    else:
+        zipfile.ZipFile(file_path).extractall(output_dir)
+    if remove_zip:
+        os.remove(file_path)
+
+
 def asf_unzip(output_dir: str, file_path: str):
     """
     Takes an output directory path and a file path to a zipped archive.
@@ -83,14 +140,13 @@ def asf_unzip(output_dir: str, file_path: str):
     assert type(file_path) == str, 'Error: file_path must be a string'
     assert ext == '.zip', 'Error: file_path must be the path of a zip'
 
-    if path_exists(output_dir):
-        if path_exists(file_path):
-            print(f"Extracting: {file_path}")
-            try:
-                zipfile.ZipFile(file_path).extractall(output_dir)
-            except zipfile.BadZipFile:
-                print(f"Zipfile Error.")
-            return
+    print(f"Extracting: {file_path}")
+    try:
+        _extract_one(output_dir, file_path)
+    except FileNotFoundError:
+        print(f"Invalid Path: {file_path}")
+    except _BAD_ARCHIVE_ERRORS:
+        print(f"Zipfile Error.")
 
         
 def get_power_set(my_set,set_size): 
@@ -118,23 +174,45 @@ def get_power_set(my_set,set_size):
     return p_set        
         
     
-def remove_nan_filled_tifs(tif_dir: str, file_names: SList):
+def _tif_is_empty(tif_path: str) -> bool:
+    """
+    Returns True if the tif at tif_path holds no data (all zero or all NaN).
+    Worker for the scan pool in remove_nan_filled_tifs.
+    """
+    raster = gdal.Open(tif_path)
+    if not raster:
+        return False
+    # approximate statistics come from overviews/samples, so the
+    # raster never has to be paged through RAM just to test for data
+    try:
+        stats = raster.GetRasterBand(1).ComputeStatistics(True)
+    except RuntimeError:
+        stats = None
+    if stats:
+        return stats[0] == 0 and stats[1] == 0
+    band = raster.ReadAsArray()
+    # any() bails out in C on the first nonzero pixel; only rasters
+    # that pass that cheap test get the full all-NaN scan
+    return not band.any() or np.isnan(band).all()
+
+
+def remove_nan_filled_tifs(tif_dir: str, file_names: list):
     """
     Takes a path to a directory containing tifs and
     and a list of the tif filenames.
-    Deletes any tifs containing only NaN values.  
+    Deletes any tifs containing only NaN values.
     """
-    assert type(tif_dir) == str, 'Error: tif_dir must be a string'
-    assert type(file_names) == SList, 'Error: file_names must be an IPython.utils.text.SList'
+    assert isinstance(tif_dir, str), 'Error: tif_dir must be a string'
     assert len(file_names) > 0, 'Error: file_names must contain at least 1 file name'
-    
+
     removed = 0
-    for tiff in file_names:
-        raster = gdal.Open(f"{tif_dir}{tiff}")
-        if raster:
-            band = raster.ReadAsArray()
-            if np.count_nonzero(band) < 1:
-                os.remove(f"{tif_dir}{tiff}")
+    paths = [f"{tif_dir}{tiff}" for tiff in file_names]
+    # each file is independent and GDAL drops the GIL while reading, so the
+    # scans run concurrently; deletions stay serial in the main thread
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count())) as executor:
+        for path, empty in zip(paths, executor.map(_tif_is_empty, paths)):
+            if empty:
+                os.remove(path)
                 removed += 1
     print(f"GeoTiffs Examined: {len(file_names)}")
     print(f"GeoTiffs Removed:  {removed}")
@@ -256,7 +334,7 @@ def get_vertex_granule_info(granule_name: str, processing_level: int) -> dict:
 
     vertex_API_URL = "https://api.daac.asf.alaska.edu/services/search/param"
     try: 
-        response = requests.post(
+        response = _SESSION.post(
             vertex_API_URL,
             params=[('granule_list', granule_name), ('output', 'json'),
                     ('processingLevel', processing_level)]
@@ -270,7 +348,136 @@ def get_vertex_granule_info(granule_name: str, processing_level: int) -> dict:
             return json_response
         else:
             print("get_vertex_granule_info() failed.\ngranule/processing level mismatch.")
-        
+
+
+def download(filename: str, request: requests.models.Response, progress=True):
+    """
+    Takes a filename and get request, streaming the file to
+    the filename while displaying a progress bar.
+    Pass progress=False to skip the progress bar and stream the
+    response straight to disk.
+    """
+    assert isinstance(filename, str), 'Error: filename must be a string'
+    assert isinstance(request, requests.models.Response), 'Error: request must be a requests.models.Response'
+
+    with open(filename, 'wb', buffering=4*1024*1024) as f:
+        start = time.perf_counter()
+        total_length = request.headers.get('content-length')
+        if total_length is None:
+            # no Content-Length to drive a progress bar; take the body whole
+            f.write(request.content)
+        elif not progress:
+            # no per-chunk bookkeeping; copyfileobj shuttles the raw stream
+            # into the kernel's write-behind cache
+            shutil.copyfileobj(request.raw, f, length=4*1024*1024)
+        else:
+            total_length = int(total_length)
+            total_length_f = float(total_length)
+            update_interval = max(total_length // 100, 1)
+            next_update = 0
+            dl = 0
+            for chunk in request.iter_content(chunk_size=4*1024*1024):
+                dl += len(chunk)
+                if chunk:
+                    f.write(chunk)
+                    # redraw once per percent of the file, keeping clock reads
+                    # and string formatting out of the per-chunk path
+                    if dl >= next_update:
+                        next_update = dl + update_interval
+                        done = int(50 * dl / total_length_f)
+                        stars = '=' * done
+                        spaces = ' ' * (50-done)
+                        bps = dl // (time.perf_counter() - start)
+                        percent = int((100*dl) / total_length_f)
+                        print(f"\r[{stars}{spaces}] {bps} bps, {percent}%    ", end='\r', flush=True)
+
+
+def _download_range(url: str, local_filename: str, start: int, end: int):
+    """
+    Fetches bytes [start, end) of url and writes them at their offset in
+    local_filename. Worker for the range pool in download_ASF_granule.
+    Raises a RequestException on a non-206 response or a short read, since
+    either would leave a hole in the pre-sized file that no size check
+    can catch.
+    """
+    r = _SESSION.get(url, headers={'Range': f"bytes={start}-{end-1}"}, stream=True)
+    if r.status_code != 206:
+        raise requests.exceptions.RequestException(
+            f"Error: expected 206 for bytes {start}-{end-1}, got {r.status_code}")
+    with open(local_filename, 'r+b') as f:
+        f.seek(start)
+        shutil.copyfileobj(r.raw, f, length=4*1024*1024)
+        copied = f.tell() - start
+    if copied != end - start:
+        raise requests.exceptions.RequestException(
+            f"Error: read {copied} of {end - start} bytes for bytes {start}-{end-1}")
+
+
+def download_ASF_granule(granule_name: str, processing_level: str) -> str:
+    """
+    Takes a string granule name and string processing level, then downloads the
+    associated granule and returns its file name.<br><br>
+    preconditions:
+    Requires AWS Vertex API authentification (already logged in).
+    Requires a valid granule name.
+    Granule and processing level must match.
+    """
+    assert type(granule_name) == str, 'Error: granule_name must be a string.'
+    assert type(processing_level) == str, 'Error: processing_level must be a string.'
+
+    vertex_info = get_vertex_granule_info(granule_name, processing_level)
+    url = vertex_info['downloadUrl']
+    local_filename = vertex_info['fileName']
+    try:
+        r = _SESSION.post(url, stream=True)
+    except requests.exceptions.RequestException as e:
+        print(e)
+        sys.exit(1)
+    else:
+        total_length = int(r.headers.get('content-length'))
+        if os.path.exists(local_filename):
+            if os.stat(local_filename).st_size == total_length:
+                print(f"{local_filename} is already present in current working directory.")
+                return local_filename
+        print(f"Downloading {url}")
+        # probe whether the server honors Range requests; if it does, pull
+        # the granule over several connections into a pre-sized file, since
+        # a single stream rarely saturates the link on multi-GB granules
+        probe = _SESSION.get(url, headers={'Range': 'bytes=0-0'})
+        if probe.status_code == 206:
+            r.close()
+            ranges = 8
+            # assemble the ranges under a temp name: a pre-sized file at the
+            # final name would pass the size checks below (and the
+            # already-present fast path on the next run) even when a range
+            # download failed partway
+            part_filename = f"{local_filename}.part"
+            with open(part_filename, 'wb') as f:
+                f.truncate(total_length)
+            bounds = [total_length * i // ranges for i in range(ranges + 1)]
+            try:
+                with ThreadPoolExecutor(max_workers=ranges) as executor:
+                    futures = []
+                    for i in range(ranges):
+                        futures.append(executor.submit(
+                            _download_range, url, part_filename, bounds[i], bounds[i+1]))
+                    for future in as_completed(futures):
+                        future.result()
+            except requests.exceptions.RequestException as e:
+                print(e)
+                os.remove(part_filename)
+                print('\nDownload failed!\n')
+                return
+            os.rename(part_filename, local_filename)
+        else:
+            download(local_filename, r)
+        if os.stat(local_filename).st_size < total_length:
+            print('\nDownload failed!\n')
+            return
+        else:
+            print('\nDone\n')
+            return local_filename
+
 
 #######################
 #  Hyp3 API Functions #
@@ -344,7 +551,7 @@ def get_product_info(products_info: list, date_range: list) -> dict:
                 granule_name = p_info['name'].split('-')[0]
                 parameters = [('granule_list', granule_name), ('output', 'json')]
                 try:
-                    response = requests.post(
+                    response = _SESSION.post(
                         vertex_API_URL,
                         params=parameters,
                         stream=True
@@ -434,47 +641,49 @@ def get_RTC_polarizations(process_type: int, base_path: str) -> str:
     assert type(base_path) == str, 'Error: base_path must be a string.'
     assert os.path.exists(base_path), f"Error: select_RTC_polarization was passed an invalid base_path, {base_path}"
     
-    polarizations = []
     if process_type == 2 or process_type == 31: # Gamma
         separator = '_'
     elif process_type == 18: # S1TBX
-        separator = '-'                
-    if polarization_exists(f"{base_path}/*/*{separator}VV.tif"):
-        polarizations.append('VV')
-    if polarization_exists(f"{base_path}/*/*{separator}VH.tif"):
-        polarizations.append('VH')
-    if polarization_exists(f"{base_path}/*/*{separator}vv.tif"):
-        polarizations.append('vv')
-    if polarization_exists(f"{base_path}/*/*{separator}vh.tif"):
-        polarizations.append('vh')
-    if polarization_exists(f"{base_path}/*/*{separator}HV.tif"):
-        polarizations.append('HV')
-    if polarization_exists(f"{base_path}/*/*{separator}HH.tif"):
-        polarizations.append('HH')  
+        separator = '-'
+    # one walk of the product directories replaces a glob per polarization,
+    # each of which re-stats the same tree
+    found = set()
+    for tif in glob.iglob(f"{base_path}/*/*{separator}??.tif"):
+        found.add(tif[-6:-4])
+    polarizations = []
+    for polarization in _POLARIZATIONS:
+        if polarization in found:
+            polarizations.append(polarization)
     if len(polarizations) > 1:
         return polarizations
     else:
         print(f"Error: found no available polarizations.")        
     
             
-def get_aquisition_date_from_product_name(product_info: dict) -> datetime.date:
+@lru_cache(maxsize=None)
+def _date_from_name(product_name: str) -> date:
+    """
+    Parses the aquisition date out of a product name string.
+    Cached so repeated lookups of the same name skip the split/int work.
+    """
+    split_name = product_name.split('_')
+    if len(split_name) == 1:
+        d = product_name.split('-')[1]
+    else:
+        d = split_name[4]
+    return date(int(d[0:4]), int(d[4:6]), int(d[6:8]))
+
+
+def get_aquisition_date_from_product_name(product_info: dict) -> date:
     """
     Takes a json dict containing the product name under the key 'name'
-    Returns its aquisition date.                        
+    Returns its aquisition date.
     Preconditions: product_info must be a dictionary containing product info, as returned from the
                    hyp3_API get_products() function.
     """
     assert type(product_info) == dict, 'Error: product_info must be a dictionary.'
-                    
-    product_name = product_info['name']
-    split_name = product_name.split('_')
-    if len(split_name) == 1:
-        split_name = product_name.split('-')
-        d = split_name[1]
-        return datetime.date(int(d[0:4]), int(d[4:6]), int(d[6:8]))
-    else:                    
-        d = split_name[4]
-        return datetime.date(int(d[0:4]), int(d[4:6]), int(d[6:8]))
+
+    return _date_from_name(product_info['name'])
 
             
             
@@ -499,9 +708,237 @@ def select_mult_parameters(name: str, things: set):
             
 def get_wget_cmd(url: str, login: EarthdataLogin) -> str:
     cmd = f"wget -c -q --show-progress --http-user={login.username} --http-password={login.password} {url}"
-    return cmd          
-            
-        
+    return cmd
+
+
+def pick_hyp3_subscription(subscriptions: list) -> int:
+    """
+    Takes a list of Hyp3 subscription dictionaries
+    and prompts the user to select a subscription id.
+    Returns the selected subscription id.
+    """
+    assert type(subscriptions) == list, 'Error: subscriptions must be a list'
+    assert len(subscriptions) > 0, 'Error: There are no subscriptions in the passed list'
+
+    subscription_ids = []
+    for subscription in subscriptions:
+        subscription_ids.append(str(subscription['id']))
+    while True:
+        print(f"Select a subscription id from the list below:")
+        for subscription in subscriptions:
+            print(f"{subscription['id']}: {subscription['name']}")
+        user_choice = input()
+        if user_choice in subscription_ids:
+            return int(user_choice)
+        clear_output()
+
+
+def date_range_valid(start_date: date = None, end_date: date = None) -> bool:
+    """
+    Takes a start and end date.
+    Returns True if the dates are valid, else False.
+    """
+    if (start_date and not end_date) or (not start_date and end_date):
+        print("Error: provide both a start and an end date, or neither.")
+        return False
+    elif start_date and end_date and start_date > end_date:
+        print("Error: the end date must be later than the start date.")
+        return False
+    else:
+        return True
+
+
+def flight_direction_valid(flight_direction: str = None) -> bool:
+    """
+    Takes a flight direction.
+    Returns True if the flight direction is valid, else False.
+    """
+    if flight_direction:
+        if flight_direction.upper() not in _VALID_DIRECTIONS:
+            print(f"Error: {flight_direction} is not a valid flight direction.")
+            print(f"Valid Directions: {sorted(_VALID_DIRECTIONS)}")
+            return False
+    return True
+
+
+def filter_date_range(product_list: list, start_date: date, end_date: date) -> list:
+    """
+    Takes a list of Hyp3 product dictionaries and a date range.
+    Returns a list of the products falling inside the date range.
+    """
+    assert isinstance(product_list, (list, tuple)), 'Error: product_list must be a list of product dictionaries.'
+
+    # sort once by acquisition date so the in-range window can be sliced
+    # out with two binary searches instead of testing every product
+    dated_products = sorted(
+        ((get_aquisition_date_from_product_name(product), product) for product in product_list),
+        key=lambda pair: pair[0])
+    dates = [pair[0] for pair in dated_products]
+    first = bisect_left(dates, start_date)
+    last = bisect_right(dates, end_date)
+    return [pair[1] for pair in dated_products[first:last]]
+
+
+def product_filter(product_list: list, flight_direction: str = None, path: int = None) -> list:
+    """
+    Takes a list of Hyp3 product dictionaries and an optional flight direction and path.
+    Returns a list of the products matching the passed flight direction and path.
+    """
+    assert isinstance(product_list, (list, tuple)), 'Error: product_list must be a list of product dictionaries.'
+
+    if flight_direction or path:
+        vertex_API_URL = "https://api.daac.asf.alaska.edu/services/search/param"
+        granule_names = []
+        for product in product_list:
+            granule_names.append(product['name'].split('-')[0])
+        matching_granules = set()
+        batch_size = 500  # keeps the comma-joined granule_list under URL length limits
+        for i in range(0, len(granule_names), batch_size):
+            parameters = [('granule_list', ','.join(granule_names[i:i+batch_size])),
+                          ('output', 'json')]
+            if flight_direction:
+                parameters.append(('flightDirection', flight_direction))
+            if path:
+                parameters.append(('relativeOrbit', path))
+            try:
+                # send the parameters in the POST body; a 500-name
+                # granule_list in the query string overruns URL length limits
+                response = _SESSION.post(vertex_API_URL, data=parameters)
+            except requests.exceptions.RequestException as e:
+                print(e)
+                sys.exit(1)
+            if response.json()[0]:
+                for granule in response.json()[0]:
+                    matching_granules.add(granule['granuleName'])
+        filtered_products = []
+        for product, granule_name in zip(product_list, granule_names):
+            if granule_name in matching_granules:
+                filtered_products.append(product)
+        return filtered_products
+    return product_list
+
+
+def _extract_worker(download_q: queue.Queue, destination_path: str):
+    """
+    Drains zip buffers from the download queue and extracts them into
+    destination_path, closing each buffer once its extractall returns.
+    Exits on a None sentinel.
+    """
+    while True:
+        zip_buf = download_q.get()
+        if zip_buf is None:
+            break
+        try:
+            with zip_buf:
+                zipfile.ZipFile(zip_buf).extractall(destination_path)
+        except _BAD_ARCHIVE_ERRORS:
+            print(f"Zipfile Error.")
+        except Exception as e:
+            # a dead worker would eventually deadlock the producer on put()
+            # against the bounded queue, so report anything else (full disk,
+            # permissions) and keep draining
+            print(e)
+
+
+def download_hyp3_products(hyp3_api_object: API, destination_path: str, start_date: date = None,
+                           end_date: date = None, flight_direction: str = None, path: int = None) -> int:
+    """
+    Takes a Hyp3 API object and a destination path.
+    Downloads and extracts every zipped product associated with a selected
+    subscription, deleting the zips as they are extracted.
+    Downloads feed a bounded queue drained by extractor threads, so
+    decompression overlaps the network transfer of later products.
+    Returns the id of the selected subscription.
+    """
+    assert isinstance(hyp3_api_object, API), 'Error: hyp3_api_object must be an asf_hyp3.API object.'
+    assert isinstance(destination_path, str), 'Error: destination_path must be a string'
+
+    subscriptions = hyp3_api_object.get_subscriptions(enabled=True)
+    subscription_id = pick_hyp3_subscription(subscriptions)
+    if subscription_id:
+        page_size = 100
+        products = list(hyp3_api_object.get_products(
+            sub_id=subscription_id, page=0, page_size=page_size) or [])
+        if len(products) == page_size:
+            # later pages are independent, so once page 0 comes back full,
+            # prefetch the following pages a few at a time instead of
+            # waiting out a full round-trip per page
+            next_page = 1
+            done = False
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                while not done:
+                    futures = []
+                    for page in range(next_page, next_page + 4):
+                        futures.append(executor.submit(
+                            hyp3_api_object.get_products,
+                            sub_id=subscription_id, page=page, page_size=page_size))
+                    next_page += 4
+                    for future in futures:
+                        product_page = future.result()
+                        if not product_page:
+                            done = True
+                            break
+                        for product in product_page:
+                            products.append(product)
+                        if len(product_page) < page_size:
+                            done = True
+                            break
+        if date_range_valid(start_date, end_date):
+            if start_date:
+                products = filter_date_range(products, start_date, end_date)
+        if flight_direction:
+            if flight_direction_valid(flight_direction):
+                products = product_filter(products, flight_direction=flight_direction)
+        if path:
+            products = product_filter(products, path=path)
+        if path_exists(destination_path):
+            print(f"\n{len(products)} products are associated with the selected date range, flight direction, and path.")
+            product_count = 0
+            # bounded so downloads pause rather than piling zips up on disk
+            # faster than the extractors can drain them
+            download_q = queue.Queue(maxsize=4)
+            extractors = []
+            for _ in range(min(8, os.cpu_count())):
+                extractor = threading.Thread(
+                    target=_extract_worker, args=(download_q, destination_path))
+                extractor.start()
+                extractors.append(extractor)
+            try:
+                for product in products:
+                    product_count += 1
+                    print(f"\nProduct Number {product_count}:")
+                    url = product['url']
+                    product_name = _HYP3_URL_RE.match(url).group(1)
+                    filename = f"{destination_path}/{product_name}"
+                    # only download and extract products not present from an earlier run
+                    if not os.path.exists(filename):
+                        print(f"\n{product_name} is not present.\nDownloading {url}")
+                        try:
+                            r = _SESSION.get(url, stream=True)
+                        except requests.exceptions.RequestException as e:
+                            print(e)
+                            sys.exit(1)
+                        # spool the archive in memory (spilling to disk past the
+                        # max_size) and queue the open buffer, so the zip skips
+                        # the write/rename/re-open/delete round trip entirely
+                        zip_buf = tempfile.SpooledTemporaryFile(max_size=256*1024*1024)
+                        shutil.copyfileobj(r.raw, zip_buf, length=4*1024*1024)
+                        zip_buf.seek(0)
+                        download_q.put(zip_buf)
+                    else:
+                        print(f"{filename} already exists.")
+            finally:
+                # always shut the extractors down, even when a download dies
+                # mid-loop; otherwise the non-daemon threads block on get()
+                # forever and hang interpreter shutdown
+                for _ in extractors:
+                    download_q.put(None)
+                for extractor in extractors:
+                    extractor.join()
+        return subscription_id
+
+
+
 ########################################
 #  Bokeh related Functions and Classes #
 ########################################
@@ -532,34 +969,35 @@ def remote_jupyter_proxy_url(port):
             
        
 class AOI:
-    def __init__(self, 
-                 lower_left_coord=[-20037508.342789244, -19971868.880408563], 
-                 upper_right_coord=[20037508.342789244, 19971868.880408563]):
-        
+    # EPSG:3857 extents of the web mercator projection, the single source
+    # of truth for coordinate validation and the hover image bounds
+    _MIN_X = -20037508.342789244
+    _MAX_X = 20037508.342789244
+    _MIN_Y = -19971868.880408563
+    _MAX_Y = 19971868.880408563
+    # the empty image the HoverTool is attached to; shared by every instance
+    _EMPTY_IMG = np.zeros((2, 2))
+
+    def __init__(self,
+                 lower_left_coord=[_MIN_X, _MIN_Y],
+                 upper_right_coord=[_MAX_X, _MAX_Y]):
+
         e_list = "Passed coordinates must be a list"
-        assert type(lower_left_coord) == list, e_list   
+        assert type(lower_left_coord) == list, e_list
         assert type(upper_right_coord) == list, e_list
-        
+
         e_length = "Error: lower_left_coord must contain one EPSG:3857 coordinate [x, y]"
         assert len(lower_left_coord) == 2, e_length
         assert len(upper_right_coord) == 2, e_length
-        
+
         e_order = "Error: A lower_left_coord value is greater than an upper_right_coord value."
         assert lower_left_coord[0] < upper_right_coord[0], e_order
         assert lower_left_coord[1] < upper_right_coord[1], e_order
-        
-        coord_error = False
+
         e_off_planet = "Error: Cannot instantiate AOI class object with invalid EPSG:3857 coordinates."
-        if lower_left_coord[0] < -20037508.342789244 or lower_left_coord[0] > 20037508.342789244:
-            coord_error = True
-        if upper_right_coord[0] < -20037508.342789244 or upper_right_coord[0] > 20037508.342789244:
-            coord_error = True
-        if lower_left_coord[1] < -19971868.880408563 or lower_left_coord[1] > 19971868.880408563:
-            coord_error = True
-        if upper_right_coord[1] < -19971868.880408563 or upper_right_coord[1] > 19971868.880408563:
-            coord_error = True 
-        if coord_error:
-            assert False, e_off_planet
+        for x, y in (lower_left_coord, upper_right_coord):
+            assert self._MIN_X <= x <= self._MAX_X, e_off_planet
+            assert self._MIN_Y <= y <= self._MAX_Y, e_off_planet
         
         self.geom = {}
         self.tiff_stack_coords = [lower_left_coord, upper_right_coord]
@@ -573,22 +1011,27 @@ class AOI:
         
         
         
-    def update_subset_bounds(self, attributes=[]):
-        def python_callback(event):
-            self.geom.update(event.__dict__['geometry'])
-            #print(event.__dict__['geometry'])
-            self.subset_coords[0][0] = event.__dict__['geometry']['x0']
-            self.subset_coords[0][1] = event.__dict__['geometry']['y0']
-            self.subset_coords[1][0] = event.__dict__['geometry']['x1']
-            self.subset_coords[1][1] = event.__dict__['geometry']['y1']
-            print("\rAOI.subset_coords: [[%s, %s], [%s, %s]]      " % (self.subset_coords[0][0], 
-                                                                       self.subset_coords[0][1], 
-                                                                       self.subset_coords[1][0], 
-                                                                       self.subset_coords[1][1]), 
-                                                                      end='\r', flush=True
-                 )
-            
-        return python_callback
+    def update_subset_bounds(self, attr, old, new):
+        """
+        Syncs AOI.subset_coords from the subset source after the
+        browser-side selection callback has updated it, so the kernel
+        only hears about completed geometry, not every mouse move.
+        """
+        if not new['xs']:
+            return
+        xs = new['xs'][0][0][0]
+        ys = new['ys'][0][0][0]
+        self.geom.update({'x0': xs[0], 'y0': ys[0], 'x1': xs[2], 'y1': ys[1]})
+        self.subset_coords[0][0] = xs[0]
+        self.subset_coords[0][1] = ys[0]
+        self.subset_coords[1][0] = xs[2]
+        self.subset_coords[1][1] = ys[1]
+        print("\rAOI.subset_coords: [[%s, %s], [%s, %s]]      " % (self.subset_coords[0][0],
+                                                                   self.subset_coords[0][1],
+                                                                   self.subset_coords[1][0],
+                                                                   self.subset_coords[1][1]),
+                                                                  end='\r', flush=True
+             )
     
     
     def reset_subset_bounds(self):
@@ -597,9 +1040,6 @@ class AOI:
     
     def create_callbacks(self):
         subset = CustomJS(args=dict(source=self.sources['subset']), code="""
-            // get data source from Callback args
-            var data = source.data;
-
             /// get BoxSelectTool dimensions from cb_data parameter of Callback
             var geometry = cb_data['geometry'];
 
@@ -610,31 +1050,24 @@ class AOI:
             var xxs = [[[x0, x0, x1, x1]]];
             var yys = [[[y0, y1, y1, y0]]];
 
-            /// update data source with new Rect attributes
-            data['xs'].pop();
-            data['ys'].pop();
-            data['xs'].push(xxs);
-            data['ys'].push(yys);
-
-            // emit update of data source
-            source.change.emit();
+            // reassign data rather than mutating it in place: only a
+            // property assignment produces the document patch that reaches
+            // the kernel's on_change hook
+            source.data = {xs: [xxs], ys: [yys]};
         """)
         
+        # closed-form inverse web mercator, inlined so each hover tick is a
+        # couple of Math calls instead of a projections module lookup and a
+        # round trip through wgs84_mercator.inverse
         latitude = CustomJSHover(code="""
-                        var projections = require("core/util/projections");
-                        var x = special_vars.x
                         var y = special_vars.y
-                        var coords = projections.wgs84_mercator.inverse([x, y])
-                        return "" + coords[1].toFixed(6)
+                        return "" + ((2 * Math.atan(Math.exp(y / 6378137)) - Math.PI / 2) * 180 / Math.PI).toFixed(6)
                     """)
-        
+
         longitude = CustomJSHover(code="""
-                        var projections = require("core/util/projections");
                         var x = special_vars.x
-                        var y = special_vars.y
-                        var coords = projections.wgs84_mercator.inverse([x, y])
-                        return "" + coords[0].toFixed(6)
-                    """)    
+                        return "" + (x / 6378137 * 180 / Math.PI).toFixed(6)
+                    """)
 
         self.callbacks.update([('subset', subset), 
                                ('latitude', latitude), 
@@ -642,41 +1075,59 @@ class AOI:
 
 
     def create_sources(self):
-        empty = np.array([np.linspace(0, 0, 2)]*2) #the empty image data to which the HoverTool is attached
-
-        lx = -20037508.342789244 #min web mercator lat
-        ly = -19971868.880408563 #min web mercator long
-        # stretch empty image across world map so lat, long hover still works if user zooms out of AOI
-        hover_img = dict(image=[empty],
-                    x=[lx],
-                    y=[ly],
-                    dw=[int(lx*-2)],
-                    dh=[int(ly*-2)])
+        # stretch the shared empty image across the world map so lat, long
+        # hover still works if user zooms out of AOI
+        hover_img = dict(image=[self._EMPTY_IMG],
+                    x=[self._MIN_X],
+                    y=[self._MIN_Y],
+                    dw=[int(self._MAX_X*2)],
+                    dh=[int(self._MAX_Y*2)])
 
         subset = ColumnDataSource(data=dict(xs=[], ys=[]))
-            
-        self.sources.update([('hover', hover_img), 
-                               ('subset', subset)])
+
+        x1 = self.tiff_stack_coords[0][0]
+        x2 = self.tiff_stack_coords[1][0]
+        y1 = self.tiff_stack_coords[0][1]
+        y2 = self.tiff_stack_coords[1][1]
+        # the innermost rings are 1-D ndarrays, the deepest level BokehJS
+        # reassembles correctly from the wire format; deeper ndarrays come
+        # back flattened and break MultiPolygons rendering
+        bbox = ColumnDataSource(data=dict(
+            xs=[[[np.array([x1, x1, x2, x2], dtype=np.float64)]]],
+            ys=[[[np.array([y1, y2, y2, y1], dtype=np.float64)]]]))
+
+        self.sources.update([('hover', hover_img),
+                               ('subset', subset),
+                               ('bbox', bbox)])
     
     
-    def build_plot(self, doc):
+    def _construct_figure(self):
+        # the figure, tiles, tools, glyphs, and callbacks only need to exist
+        # once per AOI; rebuilding them was the bulk of re-display latency
         tile_provider = get_provider('STAMEN_TERRAIN')
         box_select = BoxSelectTool(callback=self.callbacks['subset'])
             
         self.p = figure(title="Use The Square Selection Tool To Select An Area Of Interest",
                    x_range=(self.tiff_stack_coords[0][0]-10000, self.tiff_stack_coords[1][0]+10000), 
                    y_range=(self.tiff_stack_coords[0][1]-10000, self.tiff_stack_coords[1][1]+10000),
-                   x_axis_type="mercator", 
+                   x_axis_type="mercator",
                    y_axis_type="mercator",
-                   tools=['reset', box_select, 'pan', 'wheel_zoom', 'crosshair'])
+                   # rasterize the image and polygon glyphs on the GPU rather
+                   # than the HTML5 canvas; tiles ignore the backend flag
+                   output_backend="webgl",
+                   # start from an empty toolbar; every tool attached adds
+                   # initialization and DOM layout cost, so only the ones
+                   # the AOI workflow uses are added below
+                   tools=[],
+                   toolbar_location='right')
 
-        
-        hover_img = self.p.image(source=self.sources['hover'], 
-                                 image='image', 
-                                 x='x', y='y', 
-                                 dw='dw', dh='dh', 
+        hover_img = self.p.image(source=self.sources['hover'],
+                                 image='image',
+                                 x='x', y='y',
+                                 dw='dw', dh='dh',
                                  alpha=0.0)
 
+        self.p.add_tools(PanTool(), WheelZoomTool(), box_select, ResetTool())
         self.p.add_tools(HoverTool(
             renderers=[hover_img],
             tooltips=[
@@ -689,34 +1140,45 @@ class AOI:
 
         self.p.add_tile(tile_provider)
 
-        x1 = self.tiff_stack_coords[0][0]
-        x2 = self.tiff_stack_coords[1][0]
-        y1 = self.tiff_stack_coords[0][1]
-        y2 = self.tiff_stack_coords[1][1]
-        self.p.multi_polygons(xs=[[[[x1, x1, x2, x2]]]],
-                             ys=[[[[y1, y2, y2, y1]]]],
+        self.p.multi_polygons(xs='xs', ys='ys',
+                             source=self.sources['bbox'],
                              line_width=1.5, line_color='black',
                              fill_color=None)
 
         self.p.js_on_event(events.Reset, self.reset_subset_bounds())
-        self.p.on_event(events.SelectionGeometry, 
-                        self.update_subset_bounds(attributes=['geometry'])
-                       )
+        # selection geometry is drawn entirely in the browser by the
+        # BoxSelectTool CustomJS; the kernel just mirrors the source data
+        self.sources['subset'].on_change('data', self.update_subset_bounds)
         
         subset = MultiPolygons(xs='xs', ys='ys',
                                fill_alpha=0.15, fill_color='#336699',
                                line_dash='dashed'
                               )
 
-        glyph = self.p.add_glyph(self.sources['subset'], 
-                                 subset, 
-                                 selection_glyph=subset, 
+        glyph = self.p.add_glyph(self.sources['subset'],
+                                 subset,
+                                 selection_glyph=subset,
                                  nonselection_glyph=subset)
-        
+
+    def build_plot(self, doc):
+        if self.p is None:
+            self._construct_figure()
+        # a root may only belong to one document, so detach the cached
+        # figure from any previous session before re-homing it
+        if self.p.document:
+            self.p.document.remove_root(self.p)
+        # drop any roots left from an earlier build so re-displaying the AOI
+        # doesn't re-initialize every prior root on the same document
+        for root in list(doc.roots):
+            doc.remove_root(root)
         doc.add_root(self.p)
-        
-    def display_AOI(self):        
-        #output_notebook()
+
+    def display_AOI(self):
+        # clear document state accumulated by earlier show calls, then
+        # re-activate notebook output — show() dispatches through the
+        # notebook display hook that reset_output just uninstalled
+        reset_output()
+        output_notebook()
         show(self.build_plot, notebook_url=remote_jupyter_proxy_url)
         print("Selected bounding box coords stored in AOI.subset_coords")
         print("[[lower_left_x, lower_left_y], [upper_right_x, upper_right_y]]\n")